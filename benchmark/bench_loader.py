@@ -0,0 +1,33 @@
+from pathlib import Path
+from functools import partial
+
+IT = 64
+LENGTH = 5
+SAMPLE_RATE = 32000
+print("Benchmarking loader")
+
+
+def _items(iterations=100):
+    filename = Path(__file__).parent.parent / "data" / "rain.mp3"
+    return [(filename, float(i * LENGTH), LENGTH) for i in range(iterations)]
+
+
+def benchmark_serial():
+    from fastmp3 import decode_mp3
+    for filename, offset, length in _items(IT):
+        decode_mp3(filename, offset=offset, length=length)
+
+
+def benchmark_loader(num_workers: int):
+    from fastmp3 import ClipLoader
+    with ClipLoader(_items(IT), max_samples=LENGTH * SAMPLE_RATE, max_channels=1, num_workers=num_workers) as loader:
+        for clip in loader:
+            clip.samples.sum()
+
+
+__benchmarks__ = [
+    (benchmark_serial, partial(benchmark_loader, 1), "Serial vs. ClipLoader (1 worker)"),
+    (benchmark_serial, partial(benchmark_loader, 2), "Serial vs. ClipLoader (2 workers)"),
+    (benchmark_serial, partial(benchmark_loader, 4), "Serial vs. ClipLoader (4 workers)"),
+    (benchmark_serial, partial(benchmark_loader, 8), "Serial vs. ClipLoader (8 workers)"),
+]
@@ -1,2 +1,3 @@
 from .libmp3 import decode_mp3, probe_mp3, unpackbits
+from .loader import ClipLoader
 from .utils import encode_wav, encode_mp3
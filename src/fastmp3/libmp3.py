@@ -150,6 +150,24 @@ def probe_mp3(inputs: Union[np.ndarray, str, Path]) -> ProbeOutput:
     return out
 
 
+def _clip_samples(probe: ProbeOutput,
+                  offset: float = 0.0,
+                  length: Optional[float] = None) -> Tuple[int, Optional[int], int]:
+    """
+    Convert offset and length of a clip from seconds to samples.
+    :param probe: ProbeOutput of the MP3 buffer
+    :param offset: Offset in seconds
+    :param length: Optional length in seconds
+    :return: Offset and length in samples as well as the number of samples of the decoded clip
+    """
+    offset = int(offset * probe.sample_rate)
+    max_samples = max(0, probe.samples - offset)
+    if length is not None:
+        length = int(length * probe.sample_rate)
+        max_samples = min(max_samples, length)
+    return offset, length, max_samples
+
+
 def decode_mp3(inputs: Union[np.ndarray, str, Path],
                offset: float = 0.0,
                length: Optional[float] = None) -> Tuple[np.ndarray, int]:
@@ -162,12 +180,7 @@ def decode_mp3(inputs: Union[np.ndarray, str, Path],
         array is (samples, channels).
     """
     probe = probe_mp3(inputs)
-
-    offset = int(offset * probe.sample_rate)
-    max_samples = max(0, probe.samples - offset)
-    if length is not None:
-        length = int(length * probe.sample_rate)
-        max_samples = min(max_samples, length)
+    offset, length, max_samples = _clip_samples(probe, offset, length)
 
     arr_out = np.empty(shape=(max_samples, probe.channel), dtype=np.float32)
 
@@ -0,0 +1,259 @@
+import multiprocessing as mp
+import queue
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union, NamedTuple, Iterator
+
+import numpy as np
+
+from .libmp3 import probe_mp3, _decode_mp3, _clip_samples
+
+WorkItem = Tuple[Union[str, Path], float, Optional[float]]
+
+
+class Clip(NamedTuple):
+    index: int
+    samples: np.ndarray
+    sample_rate: int
+    slot: int
+    ticket: int
+
+
+def _worker(shm_name: str,
+            slot_shape: Tuple[int, int, int],
+            task_queue: mp.Queue,
+            result_queue: mp.Queue):
+    """
+    Decode work items from the task queue directly into the shared memory ring buffer. Only the metadata of each
+    decoded clip is sent back through the result queue.
+    :param shm_name: Name of the shared memory block
+    :param slot_shape: Shape of the ring buffer (slots, max_samples, max_channels)
+    :param task_queue: Queue of (index, slot, filename, offset, length) tuples shared by all workers. None stops a
+        worker.
+    :param result_queue: Queue of (index, slot, samples, channels, sample_rate, error) tuples. The number of samples
+        is the number actually decoded, which can be less than probed if the file ends early.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(slot_shape, dtype=np.float32, buffer=shm.buf)
+    _, max_samples, max_channels = slot_shape
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            index, slot, filename, offset, length = task
+            try:
+                probe = probe_mp3(filename)
+                offset, length, samples = _clip_samples(probe, offset, length)
+                channels, sample_rate = probe.channel, probe.sample_rate
+                if samples > max_samples or channels > max_channels:
+                    raise ValueError(f"Clip of shape ({samples}, {channels}) from {filename} does not fit into a slot "
+                                     f"of shape ({max_samples}, {max_channels}).")
+                arr_out = ring[slot].reshape(-1)[:samples * channels].reshape(samples, channels)
+                decoded = _decode_mp3(filename, arr_out, offset, length)
+            except Exception as error:
+                result_queue.put((index, slot, 0, 0, 0, error))
+            else:
+                result_queue.put((index, slot, decoded // channels, channels, sample_rate, None))
+    finally:
+        del ring
+        shm.close()
+
+
+class ClipLoader:
+    """
+    Decode MP3 clips in worker processes into a shared memory ring buffer of fixed-size slots. The decoded clips are
+    yielded as NumPy views of the ring buffer, so no samples are copied between the processes.
+    """
+
+    def __init__(self,
+                 items: Sequence[WorkItem],
+                 max_samples: int,
+                 max_channels: int = 2,
+                 num_workers: Optional[int] = None,
+                 prefetch: Optional[int] = None,
+                 in_order: bool = True,
+                 auto_release: bool = True,
+                 mp_context: Optional[str] = None):
+        """
+        :param items: Work items of (filename, offset, length) with offset and length in seconds. The length can be
+            None to decode until the end of the file.
+        :param max_samples: Maximum number of samples of a clip. Determines the size of the slots.
+        :param max_channels: Maximum number of channels of a clip. Determines the size of the slots.
+        :param num_workers: Number of worker processes. The workers take the items from a shared task queue, so a
+            long item does not hold up the others.
+            Defaults to the number of CPUs.
+        :param prefetch: Number of slots in the ring buffer, i.e. the maximum number of clips that are decoded ahead
+            of the consumer. Defaults to twice the number of workers.
+        :param in_order: If True, yield the clips in the order of the items, otherwise as they are completed.
+        :param auto_release: If True, the slot of a clip is recycled when the next clip is requested and the view
+            becomes invalid. If False, the slot must be released with `release` once the clip is no longer needed.
+            If all slots are held by the consumer, the iteration ends with a RuntimeError.
+        :param mp_context: Optional start method of the worker processes, e.g. 'fork' or 'spawn'
+        """
+        if max_samples <= 0 or max_channels <= 0:
+            raise ValueError("max_samples and max_channels must be positive.")
+        self.items: List[WorkItem] = [(str(filename), offset, length) for filename, offset, length in items]
+        self.max_samples = max_samples
+        self.max_channels = max_channels
+        if num_workers is not None and num_workers <= 0:
+            raise ValueError("num_workers must be positive.")
+        if prefetch is not None and prefetch <= 0:
+            raise ValueError("prefetch must be positive.")
+        num_workers = mp.cpu_count() if num_workers is None else num_workers
+        self.num_workers = max(1, min(num_workers, len(self.items)))
+        self.prefetch = 2 * self.num_workers if prefetch is None else prefetch
+        self.in_order = in_order
+        self.auto_release = auto_release
+
+        ctx = mp.get_context(mp_context)
+        slot_shape = (self.prefetch, max_samples, max_channels)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(slot_shape)) * 4)
+        self._ring = np.ndarray(slot_shape, dtype=np.float32, buffer=self._shm.buf)
+        self._free_slots = list(range(self.prefetch))
+        self._held = {}
+        self._next_ticket = 0
+        self._iterating = False
+        self._task_queue = None
+        self._workers = []
+        # From here on close() is responsible for the shared memory, even if the workers fail to start.
+        self._closed = False
+        try:
+            self._task_queue = ctx.Queue()
+            self._result_queue = ctx.Queue()
+            self._workers = [ctx.Process(target=_worker,
+                                         args=(self._shm.name, slot_shape, self._task_queue, self._result_queue),
+                                         daemon=True)
+                             for _ in range(self.num_workers)]
+            for worker in self._workers:
+                worker.start()
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __enter__(self) -> 'ClipLoader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def release(self, clip: Clip):
+        """
+        Return the slot of a clip to the ring buffer. Only allowed if auto_release is False.
+        :param clip: Clip yielded by the loader. Its samples must not be used afterwards.
+        """
+        if self.auto_release:
+            raise RuntimeError("Clips are released automatically if auto_release is True.")
+        if clip.ticket not in self._held:
+            raise ValueError(f"Clip {clip.index} with ticket {clip.ticket} is not held, it was already released.")
+        self._free_slots.append(self._held.pop(clip.ticket))
+
+    def _dispatch(self, index: int):
+        slot = self._free_slots.pop()
+        filename, offset, length = self.items[index]
+        self._task_queue.put((index, slot, filename, offset, length))
+
+    def __iter__(self) -> Iterator[Clip]:
+        """
+        Decode all items and yield a Clip of (index, samples, sample_rate, slot, ticket) for each of them. The
+        samples are a view of shape (samples, channels) into the ring buffer. The ticket is unique for every yielded
+        clip and identifies it for `release`.
+        If auto_release is False and all slots are held by the consumer, a RuntimeError ends the iteration. It cannot
+        be resumed, a new iteration starts again from the first item.
+        """
+        if self._closed:
+            raise RuntimeError("ClipLoader is closed.")
+        if self._iterating:
+            raise RuntimeError("ClipLoader is already being iterated, only one iteration can be active at a time.")
+        self._iterating = True
+        next_dispatch, next_yield, in_flight = 0, 0, 0
+        completed = {}
+        current: Optional[int] = None
+        try:
+            while next_yield < len(self.items):
+                # Items are dispatched in order, so the next item to yield always holds a slot and cannot be starved.
+                while next_dispatch < len(self.items) and self._free_slots:
+                    self._dispatch(next_dispatch)
+                    next_dispatch += 1
+                    in_flight += 1
+
+                if self.in_order and next_yield in completed:
+                    result = completed.pop(next_yield)
+                else:
+                    if in_flight == 0:
+                        raise RuntimeError("All slots are held by the consumer, the iteration ends. Release clips "
+                                           "before starting a new iteration, or increase prefetch.")
+                    result = self._receive()
+                    in_flight -= 1
+                    if self.in_order and result[0] != next_yield:
+                        completed[result[0]] = result
+                        continue
+
+                index, slot, samples, channels, sample_rate, error = result
+                # The slot is owned by the loader until the clip is handed over for manual release.
+                current = slot if self.auto_release or error is not None else None
+                if error is not None:
+                    raise error
+                next_yield += 1
+                ticket = self._next_ticket
+                self._next_ticket += 1
+                if not self.auto_release:
+                    self._held[ticket] = slot
+                yield Clip(index=index,
+                           samples=self._ring[slot].reshape(-1)[:samples * channels].reshape(samples, channels),
+                           sample_rate=sample_rate,
+                           slot=slot,
+                           ticket=ticket)
+                if self._closed:
+                    raise RuntimeError("ClipLoader is closed.")
+                if self.auto_release:
+                    self._free_slots.append(slot)
+                current = None
+        finally:
+            self._iterating = False
+            # Recycle the slots of clips that were decoded but not yielded if the iteration stopped early. After
+            # close() the workers are stopped and nothing is left to drain or recycle.
+            if not self._closed:
+                if current is not None:
+                    self._free_slots.append(current)
+                self._free_slots.extend(result[1] for result in completed.values())
+                for _ in range(in_flight):
+                    self._free_slots.append(self._receive()[1])
+
+    def _receive(self) -> tuple:
+        while True:
+            try:
+                return self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError("A ClipLoader worker exited unexpectedly.")
+
+    def close(self):
+        """
+        Stop the workers and free the shared memory. Views of the ring buffer that are still referenced keep the
+        memory mapped until they are deleted.
+        """
+        if getattr(self, '_closed', True):
+            return
+        self._closed = True
+        if self._task_queue is not None:
+            for _ in self._workers:
+                self._task_queue.put(None)
+        for worker in self._workers:
+            if worker.pid is None:
+                continue
+            worker.join(timeout=5.0)
+            if worker.is_alive():  # pragma: no cover
+                worker.terminate()
+        del self._ring
+        try:
+            self._shm.close()
+        except BufferError:  # pragma: no cover
+            pass
+        self._shm.unlink()
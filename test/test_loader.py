@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+from fastmp3 import ClipLoader, decode_mp3
+from fastmp3.libmp3 import MP3DecodingError
+
+
+@pytest.fixture(scope="module")
+def items(dataset_path):
+    return [(dataset_path / 'rain.mp3', offset, 0.5) for offset in np.arange(0, 20, 1.5)]
+
+
+@pytest.mark.parametrize('num_workers', [1, 3])
+@pytest.mark.parametrize('prefetch', [1, 4])
+def test_loader_in_order(items, num_workers, prefetch):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=num_workers, prefetch=prefetch) as loader:
+        clips = [(clip.index, clip.samples.copy(), clip.sample_rate) for clip in loader]
+
+    assert [index for index, _, _ in clips] == list(range(len(items)))
+    for (filename, offset, length), (_, samples, sample_rate) in zip(items, clips):
+        true, true_sr = decode_mp3(filename, offset=offset, length=length)
+        assert sample_rate == true_sr
+        assert np.array_equal(samples, true)
+
+
+def test_loader_as_completed(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=3, in_order=False) as loader:
+        clips = {clip.index: clip.samples.copy() for clip in loader}
+
+    assert sorted(clips) == list(range(len(items)))
+    for index, (filename, offset, length) in enumerate(items):
+        assert np.array_equal(clips[index], decode_mp3(filename, offset=offset, length=length)[0])
+
+
+def test_loader_manual_release(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=2, prefetch=2,
+                    auto_release=False) as loader:
+        held = []
+        with pytest.raises(RuntimeError):
+            for clip in loader:
+                held.append(clip)
+        assert len(held) == 2
+        for clip in held:
+            loader.release(clip)
+
+        count = 0
+        for clip in loader:
+            assert clip.samples.shape == (16000, 1)
+            loader.release(clip)
+            count += 1
+        assert count == len(items)
+
+
+def test_loader_release_twice(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=1, auto_release=False) as loader:
+        clip = next(iter(loader))
+        loader.release(clip)
+        with pytest.raises(ValueError):
+            loader.release(clip)
+
+
+def test_loader_stale_release(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=1, prefetch=2,
+                    auto_release=False) as loader:
+        clips = iter(loader)
+        stale = next(clips)
+        loader.release(stale)
+        held = [next(clips), next(clips)]
+        assert stale.slot in [clip.slot for clip in held]
+        with pytest.raises(ValueError):
+            loader.release(stale)
+
+        # The held clips must not be overwritten by items dispatched after the rejected release.
+        loader.release(held[0])
+        last = next(clips)
+        for clip in [held[1], last]:
+            filename, offset, length = items[clip.index]
+            assert np.array_equal(clip.samples, decode_mp3(filename, offset=offset, length=length)[0])
+
+
+def test_loader_release_auto(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=1) as loader:
+        clip = next(iter(loader))
+        with pytest.raises(RuntimeError):
+            loader.release(clip)
+
+
+@pytest.mark.parametrize('auto_release', [True, False])
+def test_loader_held_clip_not_overwritten(items, auto_release):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=2, prefetch=3,
+                    auto_release=auto_release) as loader:
+        clips = iter(loader)
+        clip = next(clips)
+        expected = decode_mp3(items[0][0], offset=items[0][1], length=items[0][2])[0]
+        for _ in range(len(items) - 1 if auto_release else 2):
+            other = next(clips)
+            if auto_release:
+                # Only the current clip is guaranteed, the previous slot has been recycled.
+                filename, offset, length = items[other.index]
+                expected = decode_mp3(filename, offset=offset, length=length)[0]
+                clip = other
+            assert np.array_equal(clip.samples, expected)
+
+
+def test_loader_concurrent_iteration(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=1) as loader:
+        first = iter(loader)
+        next(first)
+        with pytest.raises(RuntimeError, match='already being iterated'):
+            next(iter(loader))
+        assert len(list(first)) == len(items) - 1
+        assert len(list(loader)) == len(items)
+
+
+@pytest.mark.parametrize('num_workers,prefetch', [(0, None), (-1, None), (None, 0), (None, -1)])
+def test_loader_invalid_arguments(items, num_workers, prefetch):
+    with pytest.raises(ValueError):
+        ClipLoader(items, max_samples=16000, num_workers=num_workers, prefetch=prefetch)
+
+
+def test_loader_spawn(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=2, mp_context='spawn') as loader:
+        for clip in loader:
+            filename, offset, length = items[clip.index]
+            assert np.array_equal(clip.samples, decode_mp3(filename, offset=offset, length=length)[0])
+
+
+def test_loader_slot_too_small(items):
+    with ClipLoader(items, max_samples=100, max_channels=1, num_workers=1) as loader:
+        with pytest.raises(ValueError):
+            list(loader)
+
+
+def test_loader_corrupted(tmp_path):
+    filename = tmp_path / 'corrupted.mp3'
+    np.zeros(shape=(128000,), dtype='uint8').tofile(filename)
+    with ClipLoader([(filename, 0.0, 1.0)], max_samples=100, num_workers=1) as loader:
+        with pytest.raises(MP3DecodingError):
+            list(loader)
+
+
+def test_loader_closed(items):
+    loader = ClipLoader(items, max_samples=16000, max_channels=1, num_workers=1)
+    loader.close()
+    with pytest.raises(RuntimeError):
+        next(iter(loader))
+
+
+def test_loader_release_across_iterations(items):
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=1, prefetch=2,
+                    auto_release=False) as loader:
+        first = iter(loader)
+        stale = next(first)
+        first.close()
+        loader.release(stale)
+
+        clips = iter(loader)
+        clip = next(clips)
+        assert (clip.index, clip.slot) == (stale.index, stale.slot)
+        assert clip.ticket != stale.ticket
+        with pytest.raises(ValueError):
+            loader.release(stale)
+
+        other = next(clips)
+        loader.release(other)
+        next(clips)
+        filename, offset, length = items[clip.index]
+        assert np.array_equal(clip.samples, decode_mp3(filename, offset=offset, length=length)[0])
+
+
+def test_loader_truncated(dataset_path, tmp_path):
+    # The probe of a truncated file still reports the full length, but decoding stops at the end of the data.
+    filename = tmp_path / 'truncated.mp3'
+    raw = np.fromfile(dataset_path / 'rain.mp3', dtype='uint8')
+    raw[:raw.size // 2].tofile(filename)
+    items = [(dataset_path / 'rain.mp3', 0.0, 0.5), (filename, 400.0, 0.5)]
+    with ClipLoader(items, max_samples=16000, max_channels=1, num_workers=1, prefetch=1) as loader:
+        clips = [clip.samples.shape for clip in loader]
+    assert clips == [(16000, 1), (0, 1)]
+
+
+def test_loader_close_while_iterating(items):
+    loader = ClipLoader(items, max_samples=16000, max_channels=1, num_workers=2)
+    clips = iter(loader)
+    next(clips)
+    loader.close()
+    with pytest.raises(RuntimeError, match='closed'):
+        next(clips)